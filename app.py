@@ -1,14 +1,62 @@
+import collections
+import hashlib
+import html
+import time
+from pathlib import Path
+
+import orjson
 import requests
 import pandas as pd
 import streamlit as st
 
+BREEDS_URL = "https://api.thedogapi.com/v1/breeds"
+
+# On-disk snapshot of the breed table so fresh processes skip the API call.
+# Bump CACHE_SCHEMA_VERSION whenever the snapshot's columns change, so files
+# written by an older version of the app are never picked up.
+CACHE_SCHEMA_VERSION = 3
+CACHE_DIR = Path(".cache")
+BREEDS_CACHE = CACHE_DIR / f"breeds-v{CACHE_SCHEMA_VERSION}.parquet"
+BREEDS_ETAG = CACHE_DIR / "breeds.etag"
+CACHE_TTL_SECONDS = 24 * 60 * 60
+
+# How many result photos to ask the browser to fetch ahead of a selection
+PRELOAD_IMAGES = 10
+
+# Columns of the breed table as flattened from the API response
+BREED_COLUMNS = [
+    "Name",
+    "BredFor",
+    "Group",
+    "Origin",
+    "LifeSpan",
+    "Temperament",
+    "WeightKg",
+    "HeightCm",
+    "ImageURL",
+    "BreedID",
+]
+
+# Everything a snapshot must contain: the API columns plus derived ones
+SNAPSHOT_COLUMNS = BREED_COLUMNS + ["NameLower", "WeightKgMin", "HeightCmMin"]
+
 # Define the colors from the image (min/blue to max/red)
 TITLE_COLORS = ["#4285F4", "#42A5F5", "#34A853", "#FBBC05", "#F29900", "#EA4335"]
 
+# --------------------
+# Page config (must be the first Streamlit call)
+# --------------------
+st.set_page_config(page_title="DogDog Go", page_icon="🐾", layout="centered")
+
+# One rule per title letter colour, e.g. ".color-1 { color: #4285F4; }"
+_COLOR_RULES = " ".join(
+    f".color-{i+1} {{ color: {color}; }}" for i, color in enumerate(TITLE_COLORS)
+)
+
 # --------------------
 # Custom Styling for Google Look
 # --------------------
-custom_css = f"""
+CUSTOM_CSS = f"""
 <style>
 /* Center the main content column and limit its width */
 .css-18e3th9 {{
@@ -31,7 +79,7 @@ header {{visibility: hidden;}}
 }}
 
 /* Style for the colored letters */
-{' '.join([f'.color-{i+1} {{ color: {color}; }}' for i, color in enumerate(TITLE_COLORS)])}
+{_COLOR_RULES}
 
 /* Style the search box to be centered and rounded */
 .stTextInput > div > div > input {{
@@ -51,14 +99,9 @@ header {{visibility: hidden;}}
 """
 
 # Inject the custom CSS
-st.markdown(custom_css, unsafe_allow_html=True)
+st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
 
 
-# --------------------
-# Page config
-# --------------------
-st.set_page_config(page_title="DogDog Go", page_icon="🐾", layout="centered")
-
 # --------------------
 # Google Landing Page UI: Title
 # --------------------
@@ -78,67 +121,197 @@ st.markdown(title_html, unsafe_allow_html=True)
 # --------------------
 
 
-@st.cache_data(show_spinner=False)
-def load_breeds():
+@st.cache_resource(show_spinner=False)
+def _session():
+    """
+    HTTP session for TheDogAPI, shared by every rerun and session.
+    Streamlit re-executes this script in a fresh module on each rerun, so
+    a module-level Session would be rebuilt every time; caching it as a
+    resource keeps its pooled keep-alive connection across TTL refreshes.
+    """
+    session = requests.Session()
+    session.headers.update({"Accept-Encoding": "gzip", "Accept": "application/json"})
+    return session
+
+
+def _read_cached_breeds(max_age=CACHE_TTL_SECONDS):
+    """
+    Return the on-disk breed snapshot if it is younger than max_age
+    seconds (any age when max_age is None), otherwise None.
+    """
+    try:
+        age = time.time() - BREEDS_CACHE.stat().st_mtime
+    except OSError:
+        return None
+    if max_age is not None and age >= max_age:
+        return None
+    try:
+        df = pd.read_parquet(BREEDS_CACHE)
+    except Exception:
+        # A corrupt or half-written snapshot just means we refetch
+        return None
+    if not set(SNAPSHOT_COLUMNS).issubset(df.columns):
+        return None
+    return df
+
+
+def _write_cached_breeds(df, etag=None):
+    """
+    Store the breed table on disk for the next process start, along with
+    the ETag it was served with (if any) for later conditional requests.
+    Failing to write the cache should never break the app.
+    """
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        df.to_parquet(BREEDS_CACHE)
+        if etag:
+            BREEDS_ETAG.write_bytes(
+                orjson.dumps({"schema": CACHE_SCHEMA_VERSION, "etag": etag})
+            )
+        else:
+            BREEDS_ETAG.unlink(missing_ok=True)
+    except Exception:
+        pass
+
+
+def _read_etag():
+    """
+    ETag of the on-disk snapshot, or None if there is no usable one.
+    An ETag saved alongside a snapshot of another schema version is
+    ignored, so a 304 can never revive an old-layout file.
+    """
+    try:
+        saved = orjson.loads(BREEDS_ETAG.read_bytes())
+    except (OSError, orjson.JSONDecodeError):
+        return None
+    if not isinstance(saved, dict) or saved.get("schema") != CACHE_SCHEMA_VERSION:
+        return None
+    return saved.get("etag") or None
+
+
+def _fetch_breeds():
     """
     Fetch all dog breeds from TheDogAPI.
     Returns a pandas DataFrame with clean columns.
     This does not require an API key for basic usage.
+    A day-old snapshot on disk is reused so restarts skip the fetch.
+    Older snapshots are revalidated with If-None-Match, so an unchanged
+    breed list costs one round trip with an empty body, and are served
+    as is when the API cannot be reached.
     """
-    url = "https://api.thedogapi.com/v1/breeds"
-    resp = requests.get(url, timeout=10)
-    resp.raise_for_status()
-    data = resp.json()
-
-    # normalise into a DataFrame
-    df = pd.json_normalize(data)
-
-    # we'll keep just the columns we care about
-    keep_cols = [
-        "name",
-        "bred_for",
-        "breed_group",
-        "origin",
-        "life_span",
-        "temperament",
-        "weight.metric",
-        "height.metric",
-        "image.url",
-        "id",
+    cached = _read_cached_breeds()
+    if cached is not None:
+        return cached
+
+    # only revalidate a snapshot that passed the schema check
+    stale = _read_cached_breeds(max_age=None)
+    etag = _read_etag() if stale is not None else None
+    headers = {"If-None-Match": etag} if etag else {}
+    try:
+        resp = _session().get(BREEDS_URL, headers=headers, timeout=10)
+        resp.raise_for_status()
+    except requests.RequestException:
+        # API down or erroring; an old snapshot beats a crashed app
+        if stale is not None:
+            return stale
+        raise
+    if etag and resp.status_code == 304:
+        # still current; good for another day
+        try:
+            BREEDS_CACHE.touch()
+        except OSError:
+            pass
+        return stale
+    if resp.status_code != 200:
+        # e.g. a 304 we never asked for; there is no body to parse
+        if stale is not None:
+            return stale
+        raise requests.HTTPError(
+            f"Unexpected {resp.status_code} response from {BREEDS_URL}",
+            response=resp,
+        )
+    data = orjson.loads(resp.content)
+
+    # flatten the few nested fields we need by hand; much cheaper than
+    # pd.json_normalize, and missing keys simply come through as None
+    rows = [
+        {
+            "Name": d.get("name"),
+            "BredFor": d.get("bred_for"),
+            "Group": d.get("breed_group"),
+            "Origin": d.get("origin"),
+            "LifeSpan": d.get("life_span"),
+            "Temperament": d.get("temperament"),
+            "WeightKg": (d.get("weight") or {}).get("metric"),
+            "HeightCm": (d.get("height") or {}).get("metric"),
+            "ImageURL": (d.get("image") or {}).get("url"),
+            "BreedID": d.get("id"),
+        }
+        for d in data
     ]
+    # explicit columns so an empty response still has the full schema
+    df = pd.DataFrame(rows, columns=BREED_COLUMNS)
 
-    # Some columns may not exist for all breeds, so fill missing
-    for col in keep_cols:
-        if col not in df.columns:
-            df[col] = None
-
-    df = df[keep_cols].rename(
-        columns={
-            "name": "Name",
-            "bred_for": "BredFor",
-            "breed_group": "Group",
-            "origin": "Origin",
-            "life_span": "LifeSpan",
-            "temperament": "Temperament",
-            "weight.metric": "WeightKg",
-            "height.metric": "HeightCm",
-            "image.url": "ImageURL",
-            "id": "BreedID",
-        }
-    )
+    # lowered once here so the per-keystroke search is a plain substring scan
+    df["NameLower"] = df["Name"].str.lower()
+
+    # few distinct values across ~170 breeds; keeps the cached and
+    # on-disk copies of the table small
+    for col in ("Group", "Origin", "LifeSpan"):
+        df[col] = df[col].astype("category")
+    df["BreedID"] = pd.to_numeric(df["BreedID"], downcast="integer")
 
+    # the metric tiles only show the low end of each range; work it out
+    # once here rather than on every rerun
+    df["WeightKgMin"] = df["WeightKg"].map(parse_range)
+    df["HeightCmMin"] = df["HeightCm"].map(parse_range)
+
+    _write_cached_breeds(df, resp.headers.get("ETag"))
     return df
 
 
-def find_matches(df, query_text):
+@st.cache_data(ttl=CACHE_TTL_SECONDS, show_spinner=False)
+def load_breeds():
+    """
+    All dog breeds as (lowered names, one dict per breed, version), in
+    table order. Search and rendering only ever scan ~170 names and read a
+    handful of rows, which plain Python lists do with less per-call
+    overhead than pandas Series operations. The DataFrame from
+    _fetch_breeds() is only used to build these once per data load.
+    version fingerprints the name order, so anything holding on to row
+    positions can tell when a refresh has moved them.
+    """
+    df = _fetch_breeds()
+    names_lower = [
+        name if isinstance(name, str) else "" for name in df["NameLower"]
+    ]
+    version = hashlib.sha1("\n".join(names_lower).encode()).hexdigest()
+    return names_lower, df.to_dict("records"), version
+
+
+@st.cache_data(ttl=CACHE_TTL_SECONDS, max_entries=256, show_spinner=False)
+def _search(_names_lower, version, q, _within=None):
+    """
+    Cached lookup for an already-lowered query. The names and candidate
+    rows are skipped by Streamlit's hasher (leading underscore); the
+    cache key is q plus the data version from load_breeds(), so positions
+    cached before a refresh are never applied to a reordered table.
+    Returns the row positions whose lowered name contains q.
+    """
+    candidates = range(len(_names_lower)) if _within is None else _within
+    return [i for i in candidates if q in _names_lower[i]]
+
+
+def match_rows(names_lower, version, query_text, within=None):
     """
-    Return all rows whose Name contains the query.
+    Row positions whose Name contains the query.
     Case-insensitive, partial match.
+    within optionally limits the substring scan to rows already known to
+    match a shorter version of the query.
     """
     if not query_text:
-        return pd.DataFrame()  # empty
-    mask = df["Name"].str.contains(query_text, case=False, na=False)
-    return df[mask].reset_index(drop=True)
+        return []
+    return _search(names_lower, version, query_text.lower(), within)
 
 
 def parse_range(text_val):
@@ -157,11 +330,22 @@ def parse_range(text_val):
     return "—"
 
 
+def or_dash(val):
+    """
+    Display value for an optional text field.
+    Missing values (None, or NaN from categorical columns) and empty
+    strings become '—'.
+    """
+    if val is None or pd.isna(val) or val == "":
+        return "—"
+    return val
+
+
 # --------------------
 # Load data once
 # --------------------
 with st.spinner("Fetching breed data..."):
-    breeds_df = load_breeds()
+    names_lower, breeds, breeds_version = load_breeds()
 
 
 # --------------------
@@ -173,19 +357,53 @@ breed_query = st.text_input(
     placeholder="Search for a dog breed, try husky...",
 ).strip()
 
-results_df = find_matches(breeds_df, breed_query)
-
 
 # --------------------
 # Main result display
 # --------------------
+# Nothing to search (or render) until the user has typed something.
 if breed_query:
+    # If the query just grew by a few letters, its matches are a subset of
+    # the last ones, so the substring scan only needs to look at those rows
+    # (as long as the data has not been refreshed since).
+    query_lower = breed_query.lower()
+    last_q = st.session_state.get("_last_q", "")
+    within = None
+    if (
+        last_q
+        and query_lower.startswith(last_q)
+        and st.session_state.get("_last_version") == breeds_version
+    ):
+        within = st.session_state["_last_idx"]
+
+    result_rows = match_rows(names_lower, breeds_version, breed_query, within)
+    st.session_state["_last_q"] = query_lower
+    st.session_state["_last_idx"] = result_rows
+    st.session_state["_last_version"] = breeds_version
+
+    results = [breeds[i] for i in result_rows]
+
     st.markdown("---")  # Add a separator for results
-    if results_df.empty:
+    if not results:
         st.warning("No match found.")
     else:
         # If multiple results, let user pick one from a dropdown
-        names = results_df["Name"].tolist()
+        names = [breed["Name"] for breed in results]
+
+        # Let the browser start on the photos of the top matches while the
+        # user is still choosing, so switching breeds shows them from cache.
+        image_urls = [
+            breed["ImageURL"]
+            for breed in results
+            if isinstance(breed["ImageURL"], str)
+        ]
+        st.markdown(
+            "".join(
+                f'<link rel="preload" as="image" href="{html.escape(url)}">'
+                for url in image_urls[:PRELOAD_IMAGES]
+            ),
+            unsafe_allow_html=True,
+        )
 
         selected_name = st.selectbox(
             "Select a breed:",
@@ -193,7 +411,7 @@ if breed_query:
             index=0,
         )
 
-        row = results_df[results_df["Name"] == selected_name].iloc[0]
+        row = results[names.index(selected_name)]
 
         info_tab, img_tab = st.tabs([" Info", " Photo"])
 
@@ -209,17 +427,17 @@ if breed_query:
             # 3 metrics in a row
             col1, col2, col3 = st.columns(3)
             with col1:
-                st.metric("Weight (kg)", parse_range(row["WeightKg"]))
+                st.metric("Weight (kg)", row["WeightKgMin"])
             with col2:
-                st.metric("Height (cm)", parse_range(row["HeightCm"]))
+                st.metric("Height (cm)", row["HeightCmMin"])
             with col3:
-                st.metric("Life Span", row["LifeSpan"] if row["LifeSpan"] else "—")
+                st.metric("Life Span", or_dash(row["LifeSpan"]))
 
             # Extra details block
             st.markdown("### Details")
             st.write(
-                f"**Group:** {row['Group'] or '—'}  \n"
-                f"**Origin:** {row['Origin'] or '—'}"
+                f"**Group:** {or_dash(row['Group'])}  \n"
+                f"**Origin:** {or_dash(row['Origin'])}"
             )
 
         with img_tab:
@@ -236,22 +454,34 @@ if breed_query:
 # --------------------
 # Feedback / suggestions
 # --------------------
-with st.expander(" Feedback / Suggestions"):
-    st.write(
-        "Help improve this dog knowledge base. "
-        "We don't collect any cookies or information from you. "
-        "Go crazy"
-    )
-
-    if "feedback_log" not in st.session_state:
-        st.session_state.feedback_log = []
-
-    user_msg = st.chat_input("Anything we should add or fix?")
-    if user_msg:
-        st.session_state.feedback_log.append(user_msg)
-        st.toast("✅ Thanks! Your suggestion was recorded (locally).")
-
-    if st.session_state.feedback_log:
-        st.write("Your feedback this session:")
-        for i, msg in enumerate(st.session_state.feedback_log, start=1):
-            st.write(f"{i}. {msg}")
+# Runs as a fragment so sending feedback reruns just this panel, not the
+# breed search and result display above it.
+@st.fragment
+def _feedback_panel():
+    with st.expander(" Feedback / Suggestions"):
+        st.write(
+            "Help improve this dog knowledge base. "
+            "We don't collect any cookies or information from you. "
+            "Go crazy"
+        )
+
+        if "feedback_log" not in st.session_state:
+            # only the most recent suggestions are kept and shown
+            st.session_state.feedback_log = collections.deque(maxlen=50)
+
+        user_msg = st.chat_input("Anything we should add or fix?")
+        if user_msg:
+            st.session_state.feedback_log.append(user_msg)
+            st.toast("✅ Thanks! Your suggestion was recorded (locally).")
+
+        if st.session_state.feedback_log:
+            st.write("Your feedback this session:")
+            st.markdown(
+                "\n".join(
+                    f"{i}. {msg}"
+                    for i, msg in enumerate(st.session_state.feedback_log, start=1)
+                )
+            )
+
+
+_feedback_panel()